@@ -0,0 +1,62 @@
+""" Beta code lookup tables, generated by pybycus.beta.compile_tables. """
+
+ALPHABETS = (('\x00', '\x01', '\x02', '\x03', '\x04', '\x05', '\x06', '\x07', '\x08', '\t',
+  '\n', '\x0b', '\x0c', '\r', '\x0e', '\x0f', '\x10', '\x11', '\x12', '\x13',
+  '\x14', '\x15', '\x16', '\x17', '\x18', '\x19', '\x1a', '\x1b', '\x1c',
+  '\x1d', '\x1e', '\x1f', ' ', '!', '"', '#', '$', '%', '&', "'", '(', ')', '*',
+  '+', ',', '‐', '.', '/', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+  ':', ';', '<', '=', '>', '?', '@', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H',
+  'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W',
+  'X', 'Y', 'Z', '[', '\\', ']', '^', '—', '`', 'a', 'b', 'c', 'd', 'e', 'f',
+  'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u',
+  'v', 'w', 'x', 'y', 'z', '{', '|', '}', '~', '\x7f'),
+ ('\x00', '\x01', '\x02', '\x03', '\x04', '\x05', '\x06', '\x07', '\x08', '\t',
+  '\n', '\x0b', '\x0c', '\r', '\x0e', '\x0f', '\x10', '\x11', '\x12', '\x13',
+  '\x14', '\x15', '\x16', '\x17', '\x18', '\x19', '\x1a', '\x1b', '\x1c',
+  '\x1d', '\x1e', '\x1f', ' ', '!', '"', '#', '$', '%', '&', '’', '̔', '̓', '*',
+  '̈', ',', '‐', '.', '́', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9',
+  '·', ';', '<', '͂', '>', '̣', '@', 'α', 'β', 'ξ', 'δ', 'ε', 'φ', 'γ', 'η',
+  'ι', 'J', 'κ', 'λ', 'μ', 'ν', 'ο', 'π', 'θ', 'ρ', 'σ', 'τ', 'υ', 'ϝ', 'ω',
+  'χ', 'ψ', 'ζ', '[', '̀', ']', '^', '—', '`', 'a', 'b', 'c', 'd', 'e', 'f',
+  'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u',
+  'v', 'w', 'x', 'y', 'z', '{', 'ͅ', '}', '~', '\x7f'))
+
+CAPITALS = ((None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None),
+ (None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  'Α', 'Β', 'Ξ', 'Δ', 'Ε', 'Φ', 'Γ', 'Η', 'Ι', None, 'Κ', 'Λ', 'Μ', 'Ν', 'Ο',
+  'Π', 'Θ', 'Ρ', 'Σ', 'Τ', 'Υ', 'Ϝ', 'Ω', 'Χ', 'Ψ', 'Ζ', None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None, None, None, None, None, None, None,
+  None, None, None, None, None, None, None))
+
+QUOTES = (('“', '”'), ('„', '„'), ('“', '“'), ('‘', '’'), ('‚', '‚'), ('‛', '‛'),
+ ('«', '»'), ('‹', '›'), ('“', '„'))
+
+LSQUARE = ('[', '(', '〈', '{', '⟦', '⹄', '⹂', '⹂', '⹄', '‧', '[', '₍', '→', '$3[', '|:',
+ '', '⟦', '⌊⌊', '⟪', None, '⎧', '⎪', '⎨', '⎩', None, None, None, None, None,
+ None, '⎛', '⎜', '⎝', '', '', '', None, None, None, None, None, None, None,
+ None, None, None, None, None, None, None, '', '', '', '', '', None, None, None,
+ None, None, None, None, None, None, None, None, None, None, None, None, '⸂',
+ '⸄', '⸉', '⸋', None, None, None, None, None, None, '/', '//', '⸠', '⸡', '⸦',
+ '⸨')
+
+RSQUARE = (']', ')', '〉', '}', '⟧', '⹅', '⹃', '⹅', '⹃', '‧', '[', '₎', '←', ']$', ':|',
+ '', '⟧', '⌋⌋', '⟫', None, '⎫', '⎪', '⎬', '⎭', None, None, None, None, None,
+ None, '⎞', '⎟', '⎠', '', '', '', None, None, None, None, None, None, None,
+ None, None, None, None, None, None, None, '', '', '', '', '', None, None, None,
+ None, None, None, None, None, None, None, None, None, None, None, None, '⸃',
+ '⸅', '⸊', '⸌', None, None, None, None, None, None, '/', '//', '⸡', '⸠', '⸧',
+ '⸩')
@@ -0,0 +1,156 @@
+""" Compressed corpus archive. """
+
+import lzma
+import os
+import struct
+import zlib
+from pybycus.cite import Index, idt_path
+from pybycus.file import BLOCK_SIZE
+
+class Archive:
+    """ A corpus archive stores the files of a disc, each 8K block
+    being compressed independently, so that reading a line only
+    requires the decompression of the block that holds it.
+
+    The archive is made of a header, followed by the compressed
+    blocks and by a directory. For each file, the directory gives
+    its name, its size, its compression method and the offset table
+    of its blocks. All integers are stored in little-endian order. """
+
+    MAGIC = b"PYBYCUSA"
+    VERSION = 1
+
+    # magic, version, number of files, offset of the directory
+    HEADER = struct.Struct("<8sIIQ")
+    # length of the name, size, method, number of blocks
+    ENTRY = struct.Struct("<HQBI")
+    OFFSET = struct.Struct("<Q")
+
+    METHODS = {0: None, 1: "zlib", 2: "lzma"}
+
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        magic, version, count, directory = \
+            self.HEADER.unpack(self._f.read(self.HEADER.size))
+        assert magic == self.MAGIC and version == self.VERSION
+        self._f.seek(directory)
+        self._members = {}
+        for _ in range(count):
+            length, size, method, blocks = \
+                self.ENTRY.unpack(self._f.read(self.ENTRY.size))
+            name = self._f.read(length).decode("utf-8")
+            offsets = struct.unpack("<%dQ" % (blocks + 1),
+                                    self._f.read((blocks + 1) *
+                                                 self.OFFSET.size))
+            self._members[name] = (size, self.METHODS[method], offsets)
+
+    def close(self):
+        """ Close the archive file. """
+        self._f.close()
+
+    def names(self):
+        """ Return the names of the archived files. """
+        return list(self._members)
+
+    def open(self, name):
+        """ Return a file object reading the archived file `name'. """
+        return Member(self._f, *self._members[name])
+
+    def index(self, name):
+        """ Return the citation index of the archived text file `name'. """
+        return Index(self.open(name), self.open(idt_path(name)))
+
+class Member:
+    """ Read-only file object over an archived file. Blocks are
+    decompressed when the cursor enters them; the last one is kept. """
+
+    def __init__(self, f, size, method, offsets):
+        self._f = f
+        self._size = size
+        self._method = method
+        self._offsets = offsets
+        self._pos = 0
+        self._block = None
+        self._data = b""
+
+    def _load(self, block):
+        """ Decompress block `block'. """
+        if block != self._block:
+            self._f.seek(self._offsets[block])
+            data = self._f.read(self._offsets[block + 1] -
+                                self._offsets[block])
+            if self._method == "zlib":
+                data = zlib.decompress(data)
+            elif self._method == "lzma":
+                data = lzma.decompress(data)
+            self._block = block
+            self._data = data
+        return self._data
+
+    def read(self, size=-1):
+        """ Read up to `size' bytes. """
+        if size < 0:
+            size = self._size - self._pos
+        chunks = []
+        while size > 0 and self._pos < self._size:
+            block, start = divmod(self._pos, BLOCK_SIZE)
+            chunk = self._load(block)[start:start + size]
+            chunks.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def seek(self, offset, whence=0):
+        """ Move the cursor. """
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = offset
+        return self._pos
+
+    def tell(self):
+        """ Return the position of the cursor. """
+        return self._pos
+
+    def close(self):
+        """ Nothing to release: the archive file is shared. """
+
+def build(output, paths, method="zlib"):
+    """ Build the archive `output' from the files `paths'. """
+    code = {value: key for key, value in Archive.METHODS.items()}[method]
+    entries = []
+    with open(output, "wb") as f:
+        f.write(b"\x00" * Archive.HEADER.size)
+        for path in paths:
+            offsets = [f.tell()]
+            size = 0
+            with open(path, "rb") as member:
+                while True:
+                    data = member.read(BLOCK_SIZE)
+                    if not data:
+                        break
+                    size += len(data)
+                    if method == "zlib":
+                        data = zlib.compress(data, 9)
+                    elif method == "lzma":
+                        data = lzma.compress(data)
+                    f.write(data)
+                    offsets.append(f.tell())
+            entries.append((os.path.basename(path), size, offsets))
+
+        directory = f.tell()
+        for name, size, offsets in entries:
+            name = name.encode("utf-8")
+            f.write(Archive.ENTRY.pack(len(name), size, code,
+                                       len(offsets) - 1))
+            f.write(name)
+            f.write(struct.pack("<%dQ" % len(offsets), *offsets))
+
+        f.seek(0)
+        f.write(Archive.HEADER.pack(Archive.MAGIC, Archive.VERSION,
+                                    len(entries), directory))
+
+if __name__ == "__main__":
+    import sys
+    build(sys.argv[1], sys.argv[2:])
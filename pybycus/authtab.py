@@ -1,6 +1,6 @@
 """ AUTHTAB.DIR file parser. """
 
-from pybycus.file import File
+from pybycus.file import File, ParseError
 
 class AuthTab(File):
     """ The Author List (with the filename AUTHTAB.DIR) contains
@@ -11,8 +11,8 @@ class AuthTab(File):
     author name, the corresponding file name, synonyms, remarks,
     and language. The entries are arranged by category. """
 
-    def __init__(self, path):
-        super().__init__(path)
+    def __init__(self, path, limits=None):
+        super().__init__(path, limits)
 
         while True:
              # An (optional) synonym for the author name is introduced by a
@@ -23,15 +23,17 @@ class AuthTab(File):
                 _ = self.read_ubyte()
                 synonym = self.read_string()
                 entry["aliases"].append(synonym)
-                assert len(entry["aliases"]) <= 5
+                if len(entry["aliases"]) > 5:
+                    raise ParseError("more than five synonyms", self._f.tell())
             # The (optional) remarks field is introduced by a byte of hex 81
             # and is terminated by the first byte value above hex 7f.
             elif self.peek_ubyte() == 0x81:
-                assert False
+                raise ParseError("unsupported remarks field", self._f.tell())
             # The optional file size field is introduced by a byte of hex 82
             # and is terminated by the first byte value above hex 7f.
             elif self.peek_ubyte() == 0x82:
-                assert False
+                raise ParseError("unsupported file size field",
+                                 self._f.tell())
             # The optional language code field is introduced by a byte of hex 83
             # and is terminated by the first byte value above hex 7f.
             elif self.peek_ubyte() == 0x83:
@@ -57,7 +59,9 @@ class AuthTab(File):
                     # list. The second four bytes are binary zeroes.
                     if name == "*END":
                         padding = self.read_uint()
-                        assert len(name) == 4 and padding == 0x0000
+                        if padding != 0x0000:
+                            raise ParseError("invalid end of list",
+                                             self._f.tell() - 4)
                         break
                     listlen = self.read_uint()
                     title = self.read_string()
@@ -73,9 +77,9 @@ class AuthTab(File):
                              "aliases": []}
                     library["entries"].append(entry)
 
-def content(path):
+def content(path, limits=None):
     """ Return the content of an AUTHTAB.DIR file. """
-    return AuthTab(path).content()
+    return AuthTab(path, limits).content()
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,182 @@
+""" Benchmarks and regression gate.
+
+The parsers are run over a directory of files; the digests of their
+output and their throughput and memory usage are saved to a baseline,
+to which a later run can be compared. """
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import pybycus.beta
+from pybycus.authtab import AuthTab
+from pybycus.idt import Idt
+from pybycus.txt import Txt
+
+# The first lines of the Iliad, in Beta Code.
+SAMPLE = ("$*MH=NIN A)/EIDE QEA\\ *PHLHI+A/DEW *)AXILH=OS "
+          "OU)LOME/NHN, H(\\ MURI/' *)AXAIOI=S A)/LGE' E)/QHKE, "
+          "\"1POLLA\\S D' I)FQI/MOUS YUXA\\S *)/AI+DI PROI+/YEN\"1 "
+          "[1H(RW/WN]1, AU)TOU\\S DE\\ E(LW/RIA TEU=XE KU/NESSIN")
+
+def import_time(module, repeat=5):
+    """ Return the best time, in seconds, taken to import `module' in a
+    new interpreter, including the modules it imports. """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                                 "import " + module],
+                                capture_output=True, text=True,
+                                check=True).stderr
+        for line in output.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                seconds = int(fields[1]) / 1e6
+                best = seconds if best is None else min(best, seconds)
+    return best
+
+def convert_rate(string=SAMPLE, number=10000, repeat=5):
+    """ Return the best number of Beta Code characters converted per
+    second, over `repeat' runs. """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            pybycus.beta.convert(string)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return len(string) * number / best
+
+def _raw(path):
+    """ Return the Beta Code of the records of text file `path'. """
+    return [text for _, text in Txt(path, lazy=True).read_records(False)]
+
+def _convert(strings):
+    """ Convert `strings' from Beta Code. """
+    return [pybycus.beta.convert(string) for string in strings]
+
+# Each stage gives the files it applies to, how to prepare its input
+# (outside of the measures) and how to process it.
+STAGES = {
+    "txt": (".TXT", lambda path: path, lambda path: Txt(path).content()),
+    "txt-workers": (".TXT", lambda path: path,
+                    lambda path: Txt(path, workers=None).content()),
+    "idt": (".IDT", lambda path: path, lambda path: Idt(path).content()),
+    "authtab": (".DIR", lambda path: path,
+                lambda path: AuthTab(path).content()),
+    "beta": (".TXT", _raw, _convert),
+}
+
+def _measure(process, inputs, repeat=5):
+    """ Return the output digest, time and peak memory of `process'.
+    The time is the best of `repeat' passes, after a warm-up one. """
+    digest = None
+    best = None
+    for i in range(repeat + 1):
+        # The quotation marks state is shared by conversions.
+        pybycus.beta.set_quote_state(
+            (True,) * len(pybycus.beta.quote_state()))
+        outputs = hashlib.sha256()
+        seconds = 0.0
+        for data in inputs:
+            start = time.perf_counter()
+            output = process(data)
+            seconds += time.perf_counter() - start
+            outputs.update(repr(output).encode("utf-8"))
+        if i == 0:
+            digest = outputs
+        else:
+            best = seconds if best is None else min(best, seconds)
+    # Memory is traced in a second pass, as tracing slows the parsers.
+    pybycus.beta.set_quote_state((True,) * len(pybycus.beta.quote_state()))
+    peak = 0
+    for data in inputs:
+        tracemalloc.start()
+        process(data)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return digest.hexdigest(), best, peak
+
+def run(directory, repeat=5):
+    """ Run all stages over the files of `directory', timing the best
+    of `repeat' passes. """
+    paths = sorted(os.path.join(directory, name)
+                   for name in os.listdir(directory))
+    result = {"import": import_time("pybycus.beta"), "stages": {}}
+    for stage, (ext, prepare, process) in STAGES.items():
+        files = [path for path in paths if path.upper().endswith(ext)]
+        if not files:
+            continue
+        size = sum(os.path.getsize(path) for path in files)
+        inputs = [prepare(path) for path in files]
+        digest, seconds, peak = _measure(process, inputs, repeat)
+        result["stages"][stage] = {"files": len(files), "digest": digest,
+                                   "rate": size / seconds if seconds else None,
+                                   "memory": peak}
+    return result
+
+# Import times are a fraction of a millisecond, over which the noise of
+# starting an interpreter exceeds any relative threshold: they are only
+# taken as a regression when also longer by this many seconds.
+IMPORT_SLACK = 0.001
+
+def compare(baseline, current, threshold=0.1, slack=IMPORT_SLACK):
+    """ Return the regressions of `current' from `baseline': changed
+    outputs, throughputs (resp. memory usages) lower (resp. higher) by
+    more than `threshold', and import times longer by more than both
+    `threshold' and `slack' seconds. """
+    regressions = []
+    for stage, before in baseline["stages"].items():
+        after = current["stages"].get(stage)
+        if after is None:
+            regressions.append("%s: not run" % stage)
+            continue
+        if after["digest"] != before["digest"]:
+            regressions.append("%s: output changed" % stage)
+        if before["rate"] and after["rate"] and \
+           after["rate"] < before["rate"] * (1 - threshold):
+            regressions.append("%s: throughput %.0f B/s, was %.0f B/s"
+                               % (stage, after["rate"], before["rate"]))
+        if after["memory"] > before["memory"] * (1 + threshold):
+            regressions.append("%s: memory %d B, was %d B"
+                               % (stage, after["memory"], before["memory"]))
+    if baseline["import"] and current["import"] and \
+       current["import"] > baseline["import"] * (1 + threshold) and \
+       current["import"] > baseline["import"] + slack:
+        regressions.append("import: %.2f ms, was %.2f ms"
+                           % (current["import"] * 1e3,
+                              baseline["import"] * 1e3))
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", nargs="?",
+                        help="directory of TXT, IDT and AUTHTAB.DIR files")
+    parser.add_argument("--save", help="write the results to this baseline")
+    parser.add_argument("--compare", help="compare the results to this "
+                                          "baseline")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="tolerated relative slowdown (default: 0.1)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed passes, after a warm-up one (default: 5)")
+    args = parser.parse_args()
+    if args.directory is None:
+        print("import pybycus.beta: %.2f ms"
+              % (import_time("pybycus.beta") * 1e3))
+        print("beta.convert: %.0f chars/s" % convert_rate(repeat=args.repeat))
+        sys.exit(0)
+    results = run(args.directory, args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            found = compare(json.load(f), results, args.threshold)
+        for regression in found:
+            print("REGRESSION " + regression)
+        sys.exit(1 if found else 0)
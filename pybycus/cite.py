@@ -0,0 +1,181 @@
+""" Citation lookup. """
+
+import os
+import re
+from pybycus.idt import Idt
+from pybycus.txt import Txt
+
+def idt_path(path):
+    """ Return the path of the ID table file of text file `path'. """
+    root, ext = os.path.splitext(path)
+    return root + (".idt" if ext.islower() else ".IDT")
+
+def parse(citation):
+    """ Return the citation levels of `citation'.
+
+    A citation is either a dictionary of ID levels, as found in the
+    records, or a string such as "4.12", whose last component is the
+    z-level ID, the one before the y-level ID, and so forth up to the
+    v-level ID. """
+    if isinstance(citation, dict):
+        return {level: value for level, value in citation.items()
+                if 0x8 <= level <= 0xd}
+    return {0x8 + i: value
+            for i, value in enumerate(reversed(citation.split(".")))}
+
+def dotted(citation):
+    """ Return the string form of the citation levels of `citation'. """
+    return ".".join(citation[level] for level in sorted(citation, reverse=True)
+                    if 0x8 <= level <= 0xd)
+
+def key(citation, levels):
+    """ Return a sort key for the `levels' of `citation'.
+
+    The ID values are made of a number, optionally followed by
+    letters; they are compared numerically first. """
+    result = []
+    for level in levels:
+        number, suffix = re.match(r"([0-9]*)(.*)", citation.get(level, "")) \
+                           .groups()
+        result.append((int(number) if number else -1, suffix))
+    return tuple(result)
+
+class Index:
+    """ The ID table gives the ending citation of each block of a
+    work. To find a line, one reads the table until a block ending
+    with a citation that is not lower than the searched one is
+    found, then decodes that single block.
+
+    Block ends are compared to the searched citation on the levels
+    they give only. Documents, in particular, are given to the n
+    level: a document spanning several blocks ends all of them, and
+    each of these blocks may hold the searched line. """
+
+    def __init__(self, path, idt=None):
+        self._txt = Txt(path, lazy=True)
+        # Works are known by their (author, work) IDs and, for
+        # convenience, by the work ID alone, which designates the work
+        # of the first author holding it.
+        self._works = {}
+        idt = Idt(idt_path(path) if idt is None else idt)
+        idt.close()
+        for author in idt.authors():
+            for wnum, work in author["works"].items():
+                self._works[(author["anum"], wnum)] = work
+                self._works.setdefault(wnum, work)
+
+    def close(self):
+        """ Close the text file. """
+        self._txt.close()
+
+    def locate(self, work, citation):
+        """ Return the first block in which `citation' of `work' may be
+        found, or None. """
+        blocks = self.candidates(work, citation)
+        return blocks[0] if blocks else None
+
+    def candidates(self, work, citation):
+        """ Return the blocks in which `citation' of `work' may be
+        found, in order. """
+        if work not in self._works:
+            return []
+        work = self._works[work]
+        order = sorted(citation, reverse=True)
+        # Out-of-sequence lines are listed as exceptions.
+        for block, start, end in work["exceptions"]:
+            if _compare(citation, start, order)[0] >= 0 and \
+               _compare(citation, end, order)[0] <= 0:
+                return [block]
+        blocks = []
+        for block, end in work["blocks"]:
+            sign, complete = _compare(citation, end, order)
+            if sign < 0 or (sign == 0 and complete):
+                blocks.append(block)
+                break
+            if sign == 0:
+                blocks.append(block)
+        return blocks
+
+    def read_block(self, block):
+        """ Return the records of block `block'. """
+        return self._txt.read_block(block)
+
+def _compare(citation, bound, order):
+    """ Compare `citation' to `bound' on the levels of `order' that
+    `bound' gives: return -1, 0 or 1, and whether all the levels were
+    compared. """
+    levels = [level for level in order if level in bound]
+    target, limit = key(citation, levels), key(bound, levels)
+    return (target > limit) - (target < limit), len(levels) == len(order)
+
+def matches(ids, work):
+    """ Tell whether `ids' belong to `work', either a work ID or an
+    (author ID, work ID) tuple. """
+    if isinstance(work, tuple):
+        return (ids.get(0x80), ids.get(0x81)) == work
+    return ids.get(0x81) == work
+
+def find(records, work, citation):
+    """ Return the record of `records' matching `citation' of `work'. """
+    for record in records:
+        if matches(record[0], work) and \
+           all(record[0].get(level) == value
+               for level, value in citation.items()):
+            return record
+    return None
+
+def fetch(requests, indexes=None):
+    """ Return the records matching `requests', in the same order.
+
+    Each request is a (path, work, citation) tuple, where work is a
+    work ID or, in files holding several authors, an (author ID, work
+    ID) tuple. Requests are grouped by file and by block, so that each
+    block is decoded only once; None is returned for the citations
+    that cannot be found. The citations that may be found in several
+    blocks (see `Index') are looked for in the next one by another
+    round, until they are found.
+
+    The ID tables are read once per call, unless `indexes', a
+    dictionary of the `Index' of each path, is given: the missing
+    indexes are then added to it, and left open for later calls. """
+    requests = [(path, work, parse(citation))
+                for path, work, citation in requests]
+    result = [None] * len(requests)
+    located = []
+    owned = indexes is None
+    indexes = {} if owned else indexes
+    try:
+        for i, (path, work, citation) in enumerate(requests):
+            if path not in indexes:
+                indexes[path] = Index(path)
+            blocks = indexes[path].candidates(work, citation)
+            if blocks:
+                located.append((path, blocks, i))
+        records = None
+        current = None
+        while located:
+            located.sort(key=lambda item: (item[0], item[1][0], item[2]))
+            retry = []
+            for path, blocks, i in located:
+                if (path, blocks[0]) != current:
+                    current = (path, blocks[0])
+                    records = indexes[path].read_block(blocks[0])
+                _, work, citation = requests[i]
+                result[i] = find(records, work, citation)
+                if result[i] is None and len(blocks) > 1:
+                    retry.append((path, blocks[1:], i))
+            located = retry
+    finally:
+        if owned:
+            for index in indexes.values():
+                index.close()
+    return result
+
+def lookup(path, work, citation, indexes=None):
+    """ Return the record matching `citation' of `work' in `path'. """
+    return fetch([(path, work, citation)], indexes)[0]
+
+if __name__ == "__main__":
+    import sys
+    import pprint
+    pprint.pprint(lookup(sys.argv[1], sys.argv[2], sys.argv[3]))
@@ -3,6 +3,38 @@
 import re
 import pybycus.beta
 
+# Text files are organized in blocks of 8192 bytes.
+BLOCK_SIZE = 8192
+
+# Descriptor ID levels met so far (see `File.read_id').
+DESCRIPTORS = (0xe3, 0xe4, 0xec, 0xfa, 0xfb)
+
+class ParseError(Exception):
+    """ Raised when a file is damaged or exceeds the parsing limits. """
+
+    def __init__(self, message, offset):
+        super().__init__("%s at offset %d" % (message, offset))
+        self.offset = offset
+
+class Limits:
+    """ Limits of a parse, so that damaged or untrusted files cannot
+    exhaust the memory: the maximal length of a string (`record', in
+    bytes), the maximal number (`records') and approximate size
+    (`memory', in bytes) of the records held in memory, and the
+    maximal number of block entries of an ID table (`blocks'). None
+    means unlimited. """
+
+    def __init__(self, record=None, records=None, memory=None, blocks=None):
+        self.record = record
+        self.records = records
+        self.memory = memory
+        self.blocks = blocks
+
+    def exceeded(self, records, memory):
+        """ Tell whether `records' records of `memory' bytes are too many. """
+        return (self.records is not None and records > self.records) or \
+               (self.memory is not None and memory > self.memory)
+
 class File:
     """ You may be able to use a standard software driver to
     locate the files in the directory and read the file data from
@@ -11,15 +43,36 @@ class File:
     according to the format information presented in this
     document. """
 
-    def __init__(self, path):
-        self._f = open(path, "rb")
+    def __init__(self, path, limits=None):
+        # `path' may also be an already opened binary file object,
+        # which is then left to the caller to close.
+        self._owned = not hasattr(path, "read")
+        self._f = open(path, "rb") if self._owned else path
+        self._limits = Limits() if limits is None else limits
         self._content = []
         self._id = {}
+        self._descriptors = {}
+        self._descriptors_changed = False
+        # Citation levels (n, v..z) decoded by the last ID read, as
+        # opposed to the ones carried over or set to "1".
+        self._decoded = []
+        # Quotation marks state of the conversions (see
+        # `pybycus.beta.convert'); None for the shared one.
+        self._quotes = None
 
     def content(self):
         """ Return the content of the file. """
         return self._content
 
+    def close(self):
+        """ Close the file, if it was opened by the parser. """
+        if self._owned:
+            self._f.close()
+
+    def seek_block(self, block):
+        """ Move the cursor to the beginning of block `block'. """
+        self._f.seek(block * BLOCK_SIZE)
+
     def peek_ubyte(self):
         """ Get next unsigned byte without moving the cursor. """
         byte = self._f.read(1)
@@ -48,37 +101,69 @@ class File:
         """ Read unsigned int from file. """
         return int.from_bytes(self._f.read(4), byteorder="big")
 
+    def check_length(self, length, offset):
+        """ Fail if a string of `length' bytes is too long. """
+        if self._limits.record is not None and length > self._limits.record:
+            raise ParseError("string longer than %d bytes"
+                             % self._limits.record, offset)
+
     def read_nstring(self, length):
         """ Read string of length `length'. """
+        self.check_length(length, self._f.tell())
         string = self._f.read(length).decode("utf-8")
-        return pybycus.beta.convert(string)
+        return pybycus.beta.convert(string, self._quotes)
 
     def read_cstring(self):
         """ Read string terminated by 0xff. """
-        string = u""
-        while self.peek_ubyte() != 0xff:
-            string += chr(self.read_ubyte7())
-        return pybycus.beta.convert(string)
+        offset = self._f.tell()
+        string = bytearray()
+        while True:
+            byte = self._f.read(1)
+            if byte == b'':
+                raise ParseError("unterminated string", offset)
+            if byte == b'\xff':
+                self._f.seek(-1, 1)
+                break
+            string.append(byte[0] & 0x7f)
+            self.check_length(len(string), offset)
+        return pybycus.beta.convert(string.decode("ascii"), self._quotes)
 
     def read_string(self):
         """ Read 7-bit character string. """
-        string = u""
-        while self.peek_ubyte() <= 0x7f:
-            string += chr(self.read_ubyte())
-        return pybycus.beta.convert(string)
+        return pybycus.beta.convert(self.read_raw_string(), self._quotes)
+
+    def read_raw_string(self):
+        """ Read 7-bit character string, without converting Beta Code. """
+        offset = self._f.tell()
+        string = bytearray()
+        while True:
+            byte = self._f.read(1)
+            if byte == b'':
+                break
+            if byte[0] > 0x7f:
+                self._f.seek(-1, 1)
+                break
+            string += byte
+            self.check_length(len(string), offset)
+        return string.decode("ascii")
 
     # pylint: disable=R0912,R0915
     def read_id(self):
-        """ Read ID data. """
+        """ Read ID data.
+
+        Return the last level that was set and the last special code
+        (end-of-block, end-of-file...) that was met, if any. """
         level = None
         token = None
+        self._decoded = []
 
-        while self.peek_ubyte() > 0x7f:
+        while (self.peek_ubyte() or 0) > 0x7f:
             code = self.read_ubyte()
             left, right = (code & 0xf0) >> 4, code & 0x0f
 
             # Special code (not an ID): see below
             if left == 0xf:
+                token = code
                 # end-of-ASCII-string
                 if code == 0xff:
                     pass
@@ -125,7 +210,7 @@ class File:
                 # preparer intended a comment to appear but has no other
                 # conventional meaning and is not part of the original comment.
                 # These descriptors are not included in ID Table files.
-                elif level in [0xe3, 0xe4, 0xec, 0xfa, 0xfb]:
+                elif level in DESCRIPTORS:
                     # 0xe3 ?
                     # 0xe4 ?
                     # 0xec ?
@@ -133,7 +218,8 @@ class File:
                     # 0xfb ?
                     pass
                 else:
-                    assert False
+                    raise ParseError("unknown ID level 0x%02x" % level,
+                                     self._f.tell() - 1)
             # 0x8 z-level ID
             # 0x9 y-level ID
             # 0xa x-level ID
@@ -143,10 +229,19 @@ class File:
             elif 0x8 <= left <= 0xd:
                 level = left
 
+            # Descriptor levels are kept apart from the citation.
+            ids = self._descriptors if level in DESCRIPTORS else self._id
+            previous = ids.get(level)
+
+            # Relative IDs need the previous value of the level.
+            if right in (0x0, 0xe) and previous is None:
+                raise ParseError("relative ID without previous value",
+                                 self._f.tell())
+
             # increment the ID at this level
             if right == 0x0:
                 level_s = [i for i in
-                           re.split(r'([A-Za-z]+)', self._id[level]) if i]
+                           re.split(r'([A-Za-z]+)', ids[level]) if i]
                 if level_s[-1] == "1-2": # 1512.001
                     level_s[-1] = "1-3"
                 elif level_s[-1] == "39-40": # 0137.001
@@ -155,41 +250,51 @@ class File:
                     level_s[-1] = str(int(level_s[-1]) + 1)
                 else: # string increment
                     level_s[-1] = level_s[-1][:-1] + chr(ord(level_s[-1][-1]) + 1)
-                self._id[level] = "".join(level_s)
+                ids[level] = "".join(level_s)
             # literal binary ID values
             elif 0x1 <= right <= 0x7:
-                self._id[level] = str(right)
+                ids[level] = str(right)
             # 7-bit binary value
             elif right == 0x8:
-                self._id[level] = str(self.read_ubyte7())
+                ids[level] = str(self.read_ubyte7())
             # 7-bit binary value + single ASCII character
             elif right == 0x9:
-                self._id[level] = str(self.read_ubyte7()) + \
+                ids[level] = str(self.read_ubyte7()) + \
                                   chr(self.read_ubyte7())
             # 7-bit binary value + ASCII string
             elif right == 0xa:
-                self._id[level] = str(self.read_ubyte7()) + \
+                ids[level] = str(self.read_ubyte7()) + \
                                   self.read_cstring()
             # 14-bit binary value
             elif right == 0xb:
-                self._id[level] = str(self.read_ushort14())
+                ids[level] = str(self.read_ushort14())
             # 14-bit binary value + single ASCII character
             elif right == 0xc:
-                self._id[level] = str(self.read_ushort14()) + \
+                ids[level] = str(self.read_ushort14()) + \
                                   chr(self.read_ubyte7())
             # 14-bit binary value + ASCII string
             elif right == 0xd:
-                self._id[level] = str(self.read_ushort14()) + \
+                ids[level] = str(self.read_ushort14()) + \
                                   self.read_cstring()
             # same binary value + new single ASCII character
             elif right == 0xe:
-                self._id[level] += self.read_ubyte7()
+                ids[level] += self.read_ubyte7()
             # no binary value + ASCII string
             elif right == 0xf:
-                self._id[level] = self.read_cstring()
+                ids[level] = self.read_cstring()
+
+            if level in DESCRIPTORS:
+                self._descriptors_changed = True
+            # A change in the work or document level sets all the
+            # descriptor levels to null.
+            elif level in (0x81, 0xd) and ids[level] != previous and \
+                 self._descriptors:
+                self._descriptors = {}
+                self._descriptors_changed = True
 
             if 0x8 <= level <= 0xd:
                 for i in range(0x8, level):
                     self._id[i] = "1"
+                self._decoded.append(level)
 
         return level, token
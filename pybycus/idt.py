@@ -1,6 +1,6 @@
 """ IDT file parser. """
 
-from pybycus.file import File
+from pybycus.file import File, ParseError
 
 class Idt(File):
     """ ID Table Files
@@ -53,9 +53,35 @@ class Idt(File):
     exception would be listed along with the true block location
     for the line. """
 
+    def __init__(self, path, limits=None, anum=None, wnum=None):
+        super().__init__(path, limits)
+        self._skipped = False
+        self._stale = False
+        self._lowest = 0x8
+
+        # The sections that were not asked for are skipped, their IDs
+        # being left undecoded. Should an abbreviated ID of a later
+        # entry rely on them, the table is read again in full.
+        start = self._f.tell()
+        try:
+            self.parse(anum, wnum, True)
+        except ParseError:
+            if not self._skipped:
+                raise
+            self._f.seek(start)
+            self._content = []
+            self._id = {}
+            self._stale = False
+            self._lowest = 0x8
+            self.parse(anum, wnum, False)
+
     # pylint: disable=R0912,R0915
-    def __init__(self, path):
-        super().__init__(path)
+    def parse(self, anum, wnum, seek):
+        """ Read the entries of author `anum' and work `wnum' (all of
+        them if None). Unless `seek' is set, the other sections are
+        read but not kept. """
+        entries = 0
+        work = None
 
         # Each entry in the ID table is introduced by a type code
         # byte from zero to thirty-one (decimal). Each type of entry
@@ -82,12 +108,21 @@ class Idt(File):
             # block number is followed by the author ID.
             elif self.peek_ubyte() == 1:
                 _ = self.read_ubyte()
+                offset = self._f.tell()
                 length = self.read_ushort()
                 block = self.read_ushort()
                 level, _ = self.read_id()
-                assert level == 0x80
+                if level != 0x80:
+                    raise ParseError("author ID expected", self._f.tell())
                 author = {"anum": self._id[level], "works": {}}
-                self._content.append(author)
+                # The length is used to skip the authors that were not
+                # asked for.
+                if anum is not None and author["anum"] != anum:
+                    if seek:
+                        self.skip(offset, length, (level,))
+                        continue
+                else:
+                    self._content.append(author)
             # 2 * New work. Followed by a 2-byte length which is the length
             # of the work section (including all nested subsections).
             # The count includes the length field itself. The length is
@@ -96,12 +131,21 @@ class Idt(File):
             # is followed by the work ID.
             elif self.peek_ubyte() == 2:
                 _ = self.read_ubyte()
+                offset = self._f.tell()
                 length = self.read_ushort()
                 block = self.read_ushort()
                 level, _ = self.read_id()
-                assert level == 0x81
-                work = {"wnum": self._id[level], "desc": {}}
-                author["works"][work["wnum"]] = work
+                if level != 0x81:
+                    raise ParseError("work ID expected", self._f.tell())
+                work = {"wnum": self._id[level], "desc": {},
+                        "blocks": [], "exceptions": []}
+                # Likewise for the works.
+                if wnum is not None and work["wnum"] != wnum:
+                    if seek:
+                        self.skip(offset, length, (0x80, level))
+                        continue
+                else:
+                    author["works"][work["wnum"]] = work
             # 3 * New section. This marks the next section within the work.
             # Followed by a 2-byte block number. The block number is
             # the 8K block in which the section begins.
@@ -112,38 +156,49 @@ class Idt(File):
             # following the new subsection marker (type 3).
             elif self.peek_ubyte() == 8:
                 _ = self.read_ubyte()
-                ids = self.read_id()
+                ids = self.read_citation(work)
             # 9 * Ending ID for new section. This is the last ID entry
             # for the subsection (unless followed by an exception).
             elif self.peek_ubyte() == 9:
                 _ = self.read_ubyte()
-                ids = self.read_id()
+                ids = self.read_citation(work)
             # 10 * Last valid ID for the current block. One of these occurs
             # for each block.
             elif self.peek_ubyte() == 10:
                 _ = self.read_ubyte()
-                ids = self.read_id()
+                ids = self.read_citation(work)
+                work["blocks"].append((block, self.citation()))
+                block += 1
+                entries += 1
+                if self._limits.blocks is not None and \
+                   entries > self._limits.blocks:
+                    raise ParseError("too many blocks", self._f.tell())
             # 11 * Start exception. This introduces an out-of-sequence ID
             # (i.e. one which does not belong in the current block).
             # The 2-byte block number precedes the ID.
             elif self.peek_ubyte() == 11:
                 _ = self.read_ubyte()
-                block = self.read_ushort()
-                ids = self.read_id()
+                exception = self.read_ushort()
+                ids = self.read_citation(work)
+                start = self.citation()
             # 12 * End exception. This gives the end range for the ID
             # exception whose starting range and block number is
             # given by type 11.
             elif self.peek_ubyte() == 12:
                 _ = self.read_ubyte()
-                ids = self.read_id()
+                ids = self.read_citation(work)
+                work["exceptions"].append((exception, start,
+                                           self.citation()))
             # 13 * Single exception: A single out-of-sequence id.
             elif self.peek_ubyte() == 13:
                 _ = self.read_ubyte()
-                block = self.read_ushort()
-                ids = self.read_id()
+                exception = self.read_ushort()
+                ids = self.read_citation(work)
+                work["exceptions"].append((exception, self.citation(),
+                                           self.citation()))
             # 14 * Undefined.
             elif self.peek_ubyte() == 14:
-                assert False
+                raise ParseError("undefined entry type 14", self._f.tell())
             # 16 * Description of ID fields a..b. Followed by a 1-byte
             # identifier (a..b=O..l) and a 1-byte length. The length
             # pertains to the description only and does not include
@@ -174,28 +229,88 @@ class Idt(File):
             elif self.peek_ubyte() == 17:
                 _ = self.read_ubyte()
                 level = self.read_ubyte()
-                assert 0 <= level <= 4
+                if level > 4:
+                    raise ParseError("unknown level %d" % level,
+                                     self._f.tell() - 1)
                 length = self.read_ubyte()
                 desc = self.read_nstring(length)
                 work["desc"][level] = desc
             # 18-30 * Undefined
             elif 18 <= self.peek_ubyte() <= 30:
-                assert False
+                raise ParseError("undefined entry type %d" % self.peek_ubyte(),
+                                 self._f.tell())
             # 31 * Introduces header of combined ID table. Followed by 3
             # length bytes, which give the total length in bytes of
             # the combined table. The count includes both the type
             # code byte and the length bytes.
             elif self.peek_ubyte() == 31:
-                assert False
+                _ = self.read_ubyte()
+                length = int.from_bytes(self._f.read(3), byteorder="big")
+            else:
+                raise ParseError("unknown entry type %d" % self.peek_ubyte(),
+                                 self._f.tell())
+
+        # Only the authors holding one of the requested works are kept.
+        if wnum is not None:
+            self._content = [author for author in self._content
+                             if author["works"]]
+
+    def skip(self, offset, length, levels):
+        """ Skip the section whose length field, at `offset', is
+        `length', keeping only the ID `levels' of its header.
+
+        The IDs of the section are not decoded, so that the other
+        levels would be stale: they are cleared until a citation gives
+        them all again (see `read_citation'). """
+        if length < 2:
+            raise ParseError("invalid length", offset)
+        self._skipped = True
+        self._stale = True
+        self._f.seek(offset + length)
+        self._id = {level: self._id[level] for level in levels
+                    if level in self._id}
+
+    def read_citation(self, work):
+        """ Read the ID of a citation entry of `work'.
+
+        After a skip, the citation levels are unknown until an ID
+        gives the top level of the work, as described by its type 17
+        entries (identifier 0 alone being either the z or the n
+        level): setting a level sets all the levels below it. Any
+        other ID might rely on the skipped levels, and fails with a
+        ParseError instead of being decoded wrong. """
+        ids = self.read_id()
+        if self._stale:
+            levels = work["desc"] if work is not None else {}
+            if set(levels) == {0}:
+                tops = (0x8, 0xd)
             else:
-                assert False
+                tops = (0x8 + max(levels),) if levels else ()
+            if not self._decoded or max(self._decoded) not in tops:
+                raise ParseError("abbreviated ID after a skipped section",
+                                 self._f.tell())
+            self._stale = False
+        return ids
+
+    def authors(self):
+        """ Return the list of the authors of the ID table, each with
+        its works. This is the content of the file. """
+        return self._content
 
-        assert len(self._content) == 1
-        self._content = self._content[0]
+    def citation(self):
+        """ Return the citation levels (n, v..z) given by the last ID:
+        the levels it decoded and the ones above them. The levels
+        below, which the format sets to "1", are left out: documents,
+        for instance, are only given to the n level. An ID with no
+        citation level repeats the previous citation. """
+        if self._decoded:
+            self._lowest = min(self._decoded)
+        return {level: value for level, value in self._id.items()
+                if self._lowest <= level <= 0xd}
 
-def content(path):
-    """ Return the content of an IDT file. """
-    return Idt(path).content()
+def content(path, limits=None, anum=None, wnum=None):
+    """ Return the content of an IDT file: the list of its authors. """
+    return Idt(path, limits, anum, wnum).content()
 
 if __name__ == "__main__":
     import sys
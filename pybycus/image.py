@@ -0,0 +1,149 @@
+""" Prebuilt corpus image. """
+
+import bisect
+import io
+import mmap
+import os
+import struct
+from pybycus.cite import dotted
+from pybycus.txt import Txt
+
+class Image:
+    """ A corpus image holds the decoded records of a set of text
+    files in a single flat binary file. It is memory-mapped, so that
+    several processes reading the same image share the same pages,
+    and records are decoded from the mapping on demand.
+
+    The image is made of a header, followed by the record texts,
+    the record IDs, a table giving the location of the texts and IDs
+    of each record, and a sorted citation index. All integers are
+    stored in little-endian order. """
+
+    MAGIC = b"PYBYCUS\x00"
+    VERSION = 2
+
+    # magic, version, number of records, number of keys, offsets of the
+    # IDs, of the record table, of the key table and of the keys
+    HEADER = struct.Struct("<8sIIIQQQQ")
+    # offset and length of the IDs, offset and length of the text
+    RECORD = struct.Struct("<QIQI")
+    # offset and length of the key, record number
+    KEY = struct.Struct("<QII")
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self._nrecords, self._nkeys, _,
+         self._records, self._keytable, _) = self.HEADER.unpack_from(self._map)
+        assert magic == self.MAGIC and version == self.VERSION
+
+    def __len__(self):
+        return self._nrecords
+
+    def close(self):
+        """ Release the mapping. """
+        self._map.close()
+
+    def record(self, number):
+        """ Return record `number' as an [ID, text] pair. """
+        ids_off, ids_len, text_off, text_len = self.RECORD.unpack_from(
+            self._map, self._records + number * self.RECORD.size)
+        ids = {}
+        if ids_len:
+            for field in self._map[ids_off:ids_off + ids_len] \
+                             .decode("utf-8").split("\x1f"):
+                level, value = field.split("\x1e")
+                ids[int(level)] = value
+        return [ids, self._map[text_off:text_off + text_len].decode("utf-8")]
+
+    def records(self):
+        """ Iterate over all records. """
+        for number in range(self._nrecords):
+            yield self.record(number)
+
+    def _key(self, number):
+        """ Return key `number' and the record it points to. """
+        key_off, key_len, record = self.KEY.unpack_from(
+            self._map, self._keytable + number * self.KEY.size)
+        return self._map[key_off:key_off + key_len], record
+
+    def lookup(self, name, author, work, citation):
+        """ Return the record of text file `name' (e.g. "LAT0474")
+        matching `citation' of `work' of `author', or None. """
+        key = make_key(name, author, work, citation)
+        keys = _Keys(self._key, self._nkeys)
+        number = bisect.bisect_left(keys, key)
+        if number < self._nkeys:
+            found, record = self._key(number)
+            if found == key:
+                return self.record(record)
+        return None
+
+class _Keys:
+    """ Sequence view of the keys of an image, for bisection. """
+
+    def __init__(self, key, length):
+        self._get = key
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, number):
+        return self._get(number)[0]
+
+def make_key(name, author, work, citation):
+    """ Return the index key of a citation. """
+    return "\x00".join((name, author, work, citation)).encode("utf-8")
+
+def _serialize(ids):
+    """ Serialize the ID of a record. """
+    return "\x1f".join("%d\x1e%s" % (level, value)
+                       for level, value in ids.items()).encode("utf-8")
+
+def build(output, paths):
+    """ Build the image `output' from the text files `paths'. """
+    ids_blob = io.BytesIO()
+    table = []
+    keys = {}
+    with open(output, "wb") as f:
+        f.write(b"\x00" * Image.HEADER.size)
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            for ids, text in Txt(path).content():
+                ids_data = _serialize(ids)
+                text_data = text.encode("utf-8")
+                key = make_key(name, ids.get(0x80, ""), ids.get(0x81, ""),
+                               dotted(ids))
+                # The first occurrence of a repeated citation wins.
+                keys.setdefault(key, len(table))
+                table.append((ids_blob.tell(), len(ids_data),
+                              f.tell(), len(text_data)))
+                ids_blob.write(ids_data)
+                f.write(text_data)
+
+        # The ID offsets are only known once the texts are written.
+        ids_start = f.tell()
+        f.write(ids_blob.getbuffer())
+        records_start = f.tell()
+        for ids_off, ids_len, text_off, text_len in table:
+            f.write(Image.RECORD.pack(ids_start + ids_off, ids_len,
+                                      text_off, text_len))
+
+        keytable_start = f.tell()
+        keys_start = keytable_start + len(keys) * Image.KEY.size
+        offset = keys_start
+        for key in sorted(keys):
+            f.write(Image.KEY.pack(offset, len(key), keys[key]))
+            offset += len(key)
+        for key in sorted(keys):
+            f.write(key)
+
+        f.seek(0)
+        f.write(Image.HEADER.pack(Image.MAGIC, Image.VERSION, len(table),
+                                  len(keys), ids_start, records_start,
+                                  keytable_start, keys_start))
+
+if __name__ == "__main__":
+    import sys
+    build(sys.argv[1], sys.argv[2:])
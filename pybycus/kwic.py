@@ -0,0 +1,108 @@
+""" Keyword-in-context concordance. """
+
+import collections
+import heapq
+import pickle
+import re
+import tempfile
+import unicodedata
+from pybycus.txt import Txt
+
+# Letters, including combining diacritics of Greek text.
+WORD = r"[\w\u0300-\u036f]"
+
+def scan(records, word, width=40):
+    """ Iterate over the (ID, left context, keyword, right context)
+    lines of `word' in `records'.
+
+    The records are scanned as a continuous text: contexts of up to
+    `width' characters cross record boundaries. A line is produced
+    as soon as enough text follows the keyword.
+
+    The keyword and the text are put in canonical decomposed form
+    (NFD), so that Greek diacritics match whatever their order; the
+    contexts are returned in that form. """
+    word = unicodedata.normalize("NFD", word)
+    pattern = re.compile(r"(?<!%s)%s(?!%s)" % (WORD, re.escape(word), WORD),
+                         re.IGNORECASE)
+    tail = ""
+    pending = collections.deque()
+    for ids, text in records:
+        text = unicodedata.normalize("NFD", text)
+        for line in pending:
+            line[3] += " " + text
+        while pending and len(pending[0][3]) >= width:
+            line = pending.popleft()
+            yield line[0], line[1], line[2], line[3][:width]
+        for match in pattern.finditer(text):
+            left = _join(tail, text[:match.start()])[-width:]
+            line = [ids, left, match.group(), text[match.end():]]
+            if len(line[3]) >= width:
+                yield line[0], line[1], line[2], line[3][:width]
+            else:
+                pending.append(line)
+        tail = _join(tail, text)[-width:]
+    for line in pending:
+        yield line[0], line[1], line[2], line[3][:width]
+
+def _join(left, right):
+    """ Join two pieces of text, separated by a space if both are set. """
+    return left + " " + right if left else right
+
+def _left(line):
+    """ Sort key on the left context, nearest characters first. """
+    return line[1][::-1].casefold()
+
+def _right(line):
+    """ Sort key on the right context. """
+    return line[3].casefold()
+
+def _spill(lines):
+    """ Write sorted `lines' to a temporary file, return a reader. """
+    f = tempfile.TemporaryFile()
+    for line in lines:
+        pickle.dump(line, f)
+    f.seek(0)
+    def read():
+        with f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    return read()
+
+def sort(lines, key, limit=100000):
+    """ Sort `lines' on their left or right context (`key' is "left"
+    or "right"). At most `limit' lines are kept in memory: sorted
+    runs are spilled to temporary files, then merged. """
+    key = {"left": _left, "right": _right}[key]
+    runs = []
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= limit:
+            buffer.sort(key=key)
+            runs.append(_spill(buffer))
+            buffer = []
+    buffer.sort(key=key)
+    runs.append(iter(buffer))
+    return heapq.merge(*runs, key=key)
+
+def concordance(paths, word, width=40, order=None, limit=100000):
+    """ Iterate over the concordance lines of `word' in the text
+    files `paths', optionally sorted by "left" or "right" context. """
+    def lines():
+        for path in paths:
+            yield from scan(Txt(path, lazy=True).read_records(), word, width)
+    if order is None:
+        return lines()
+    return sort(lines(), order, limit)
+
+if __name__ == "__main__":
+    import sys
+    from pybycus.cite import dotted
+    for ids, left, keyword, right in concordance(sys.argv[2:], sys.argv[1],
+                                                 order="right"):
+        print("%s %s %-12s %40s %s %s" % (ids.get(0x80, ""), ids.get(0x81, ""),
+                                          dotted(ids), left, keyword, right))
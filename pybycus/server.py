@@ -0,0 +1,267 @@
+""" Local query service. """
+
+import collections
+import http.server
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+import pybycus.beta
+from pybycus.authtab import AuthTab
+from pybycus.cite import Index, dotted, find, key, matches, parse
+from pybycus.kwic import scan
+from pybycus.txt import Txt
+
+class LRU:
+    """ Least recently used cache, bounded by the total size of its
+    values as given by `sizeof'. Values are loaded outside of the lock
+    of the cache, so that a slow load does not hold up the other keys;
+    a key being loaded is locked on its own, so that it is loaded
+    once. """
+
+    def __init__(self, maxsize, sizeof=lambda value: 1):
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._maxsize = maxsize
+        self._sizeof = sizeof
+        self._size = 0
+        self._data = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        """ Return the (value,) of `key' if it is cached, or None. """
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return (self._data[key][0],)
+            return None
+
+    def get(self, key, load):
+        """ Return the value of `key', calling `load' on a miss. """
+        found = self._get(key)
+        if found:
+            return found[0]
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            # The key may have been loaded while waiting for its lock.
+            found = self._get(key)
+            if found:
+                return found[0]
+            try:
+                value = load()
+            except BaseException:
+                with self._lock:
+                    del self._loading[key]
+                raise
+            size = self._sizeof(value)
+            with self._lock:
+                self.misses += 1
+                self._data[key] = (value, size)
+                self._size += size
+                while self._size > self._maxsize and len(self._data) > 1:
+                    _, (_, size) = self._data.popitem(last=False)
+                    self._size -= size
+                del self._loading[key]
+            return value
+
+    def stats(self):
+        """ Return the size and hit ratio of the cache. """
+        total = self.hits + self.misses
+        return {"entries": len(self._data), "size": self._size,
+                "hits": self.hits, "misses": self.misses,
+                "ratio": self.hits / total if total else None}
+
+def _sizeof_block(records):
+    """ Approximate size of a decoded block, in characters. """
+    return sum(len(text) + 64 for _, text in records)
+
+def _record(record):
+    """ Return the JSON form of a record. """
+    ids, text = record
+    return {"author": ids.get(0x80), "work": ids.get(0x81),
+            "citation": dotted(ids), "text": text}
+
+class Service:
+    """ The service keeps the author table, the citation indexes of
+    the text files and their recently decoded blocks in memory, and
+    answers queries about the files of directory `root'.
+
+    The blocks of a file are read through the file of its index, one
+    at a time: each index is cached with its own lock. """
+
+    def __init__(self, root, indexes=64, blocks=16 * 1024 * 1024):
+        self._root = root
+        self._lock = threading.Lock()
+        self._authtab = None
+        self._indexes = LRU(indexes)
+        self._blocks = LRU(blocks, _sizeof_block)
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=10000))
+
+    def _path(self, name, ext):
+        """ Return the path of the file `name' of the disc. """
+        if not re.fullmatch(r"[A-Za-z0-9]+", name):
+            raise KeyError(name)
+        for candidate in (name + ext.upper(), name + ext.lower()):
+            path = os.path.join(self._root, candidate)
+            if os.path.exists(path):
+                return path
+        raise KeyError(name)
+
+    def _index(self, name):
+        """ Return the citation index of text file `name', with the
+        lock of its reads. """
+        path = self._path(name, ".txt")
+        return self._indexes.get(name,
+                                 lambda: (Index(path), threading.Lock()))
+
+    def _block(self, name, block):
+        """ Return the records of block `block' of text file `name'. """
+        index, lock = self._index(name)
+        def load():
+            with lock:
+                return index.read_block(block)
+        return self._blocks.get((name, block), load)
+
+    def authors(self, query):
+        """ Return the authors whose name or alias contains `query'. """
+        with self._lock:
+            if self._authtab is None:
+                authtab = AuthTab(self._path("AUTHTAB", ".dir"))
+                authtab.close()
+                self._authtab = authtab.content()
+        query = query.casefold()
+        return [dict(entry, library=library["name"])
+                for library in self._authtab
+                for entry in library["entries"]
+                if query in entry["name"].casefold() or
+                any(query in alias.casefold()
+                    for alias in entry["aliases"])]
+
+    def cite(self, name, work, citation):
+        """ Return the record of `citation' of `work' in `name'. """
+        citation = parse(citation)
+        for block in self._index(name)[0].candidates(work, citation):
+            record = find(self._block(name, block), work, citation)
+            if record is not None:
+                return _record(record)
+        return None
+
+    def range(self, name, work, first, last):
+        """ Return the records of `work' from `first' to `last'. """
+        first, last = parse(first), parse(last)
+        levels = sorted(first, reverse=True)
+        start, end = key(first, levels), key(last, levels)
+        result = []
+        index = self._index(name)[0]
+        blocks = index.candidates(work, first), index.candidates(work, last)
+        if not all(blocks):
+            return result
+        for block in range(blocks[0][0], blocks[1][-1] + 1):
+            for record in self._block(name, block):
+                if matches(record[0], work) and \
+                   start <= key(record[0], levels) <= end:
+                    result.append(_record(record))
+        return result
+
+    def search(self, name, word, width=40, limit=1000):
+        """ Return the first `limit' lines of the concordance of `word'
+        in text file `name'.
+
+        The file is streamed on its own, without going through the
+        caches: a search neither waits for nor evicts the blocks
+        of the other queries. """
+        txt = Txt(self._path(name, ".txt"), lazy=True)
+        try:
+            records = txt.read_records(
+                quotes=[True] * len(pybycus.beta.quote_state()))
+            return [{"author": ids.get(0x80), "work": ids.get(0x81),
+                     "citation": dotted(ids), "left": left,
+                     "keyword": keyword, "right": right}
+                    for ids, left, keyword, right in itertools.islice(
+                        scan(records, word, width), limit)]
+        finally:
+            txt.close()
+
+    def record(self, endpoint, seconds):
+        """ Record the latency of a query. """
+        self._latencies[endpoint].append(seconds)
+
+    def stats(self):
+        """ Return the latency percentiles and the cache statistics. """
+        latencies = {}
+        for endpoint, values in list(self._latencies.items()):
+            values = sorted(values)
+            latencies[endpoint] = {
+                "count": len(values),
+                **{"p%d" % p: values[min(len(values) - 1,
+                                         len(values) * p // 100)]
+                   for p in (50, 90, 99)}}
+        return {"latency": latencies,
+                "cache": {"indexes": self._indexes.stats(),
+                          "blocks": self._blocks.stats()}}
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """ GET /authors?q=NAME
+        GET /cite?file=LAT0474&work=001&cite=4.12
+        GET /range?file=LAT0474&work=001&from=4.12&to=4.20
+        GET /search?file=LAT0474&q=WORD[&width=40][&limit=1000]
+        GET /stats """
+
+    service = None
+
+    def do_GET(self):
+        """ Answer a query with a JSON document. """
+        # pylint: disable=C0103
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        endpoint = url.path.strip("/")
+        try:
+            if endpoint == "authors":
+                result = self.service.authors(query["q"])
+            elif endpoint == "cite":
+                result = self.service.cite(query["file"], query["work"],
+                                           query["cite"])
+            elif endpoint == "range":
+                result = self.service.range(query["file"], query["work"],
+                                            query["from"], query["to"])
+            elif endpoint == "search":
+                result = self.service.search(query["file"], query["q"],
+                                             int(query.get("width", 40)),
+                                             int(query.get("limit", 1000)))
+            elif endpoint == "stats":
+                result = self.service.stats()
+            else:
+                self.send_error(404)
+                return
+        except (KeyError, ValueError) as error:
+            self.send_error(400, repr(error))
+            return
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.service.record(endpoint, time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        # pylint: disable=W0622
+        pass
+
+def serve(root, host="127.0.0.1", port=8000):
+    """ Return a server answering queries about the files of `root'. """
+    handler = type("Handler", (Handler,), {"service": Service(root)})
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+if __name__ == "__main__":
+    import sys
+    serve(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000) \
+        .serve_forever()
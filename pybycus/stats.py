@@ -0,0 +1,94 @@
+""" Word and n-gram frequencies. """
+
+import collections
+import functools
+import heapq
+import multiprocessing
+import os
+import re
+import tempfile
+from pybycus.kwic import WORD
+from pybycus.txt import Txt
+
+TOKEN = re.compile(r"%s+" % WORD)
+
+def _spill(counter, directory):
+    """ Write `counter' to a temporary file, sorted; return its name. """
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv",
+                                     dir=directory, delete=False) as f:
+        for (author, work, gram), count in sorted(counter.items()):
+            f.write("%s\t%s\t%s\t%d\n" % (author, work, gram, count))
+    return f.name
+
+def _read(name):
+    """ Iterate over the ((author, work, gram), count) of a spilled file. """
+    with open(name, encoding="utf-8") as f:
+        for line in f:
+            author, work, gram, count = line.rstrip("\n").split("\t")
+            yield (author, work, gram), int(count)
+
+def merge(names):
+    """ Iterate over the summed counts of the sorted files `names'. """
+    current, total = None, 0
+    for key, value in heapq.merge(*[_read(name) for name in names],
+                                  key=lambda item: item[0]):
+        if key != current:
+            if current is not None:
+                yield current, total
+            current, total = key, 0
+        total += value
+    if current is not None:
+        yield current, total
+
+def count(path, n=3, limit=1000000, directory=None):
+    """ Count the words and n-grams (up to `n' words) of the text file
+    `path', by author (a-level) and work (b-level). When more than
+    `limit' distinct n-grams are counted, they are spilled to a
+    temporary file. Return the names of the sorted spilled files. """
+    counter = collections.Counter()
+    names = []
+    group = None
+    for ids, text in Txt(path, lazy=True).read_records():
+        # N-grams span lines, but not works.
+        if (ids.get(0x80, ""), ids.get(0x81, "")) != group:
+            group = (ids.get(0x80, ""), ids.get(0x81, ""))
+            window = collections.deque(maxlen=n)
+        for token in TOKEN.findall(text.casefold()):
+            window.append(token)
+            words = tuple(window)
+            for size in range(1, len(words) + 1):
+                counter[group + (" ".join(words[-size:]),)] += 1
+        if len(counter) >= limit:
+            names.append(_spill(counter, directory))
+            counter.clear()
+    names.append(_spill(counter, directory))
+    return names
+
+def statistics(paths, output, n=3, processes=None, limit=1000000,
+               min_count=1, directory=None):
+    """ Count the words and n-grams of the text files `paths' in a
+    pool of `processes' workers, and write them to `output', sorted
+    by author, work and n-gram. Each line gives the author, the work,
+    the number of words, the n-gram and its count; n-grams seen less
+    than `min_count' times are left out.
+
+    The partial counts of the workers are merged from sorted files,
+    so that the memory of each process is bounded by `limit'. """
+    worker = functools.partial(count, n=n, limit=limit, directory=directory)
+    with multiprocessing.Pool(processes) as pool:
+        names = [name for result in pool.imap_unordered(worker, paths)
+                 for name in result]
+    try:
+        with open(output, "w", encoding="utf-8") as f:
+            for (author, work, gram), total in merge(names):
+                if total >= min_count:
+                    f.write("%s\t%s\t%d\t%s\t%d\n" % (author, work,
+                                                      gram.count(" ") + 1,
+                                                      gram, total))
+    finally:
+        for name in names:
+            os.remove(name)
+
+if __name__ == "__main__":
+    import sys
+    statistics(sys.argv[2:], sys.argv[1])
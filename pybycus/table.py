@@ -0,0 +1,158 @@
+""" Columnar table of TXT records, backed by NumPy arrays. """
+
+import array
+import re
+from pybycus.txt import Txt
+
+try:
+    import numpy
+except ImportError as error:
+    raise ImportError("pybycus.table requires NumPy") from error
+
+# Citation levels, by name.
+LEVELS = {"n": 0xd, "v": 0xc, "w": 0xb, "x": 0xa, "y": 0x9, "z": 0x8}
+
+class Table:
+    """ The records of a text file, stored by column.
+
+    The author (a-level) and work (b-level) IDs are categorical: an
+    array of codes indexes the list of their values. Each citation
+    level (n, v..z) is split into an array of numbers (-1 when the ID
+    has no leading number or is missing) and an array of codes of
+    the suffixes that follow the numbers, the empty suffix having
+    code 0. The texts are concatenated in a single UTF-8 buffer, an
+    array of offsets giving the start and end of each of them.
+
+    Slices share the arrays of the table; boolean masks, such as the
+    ones returned by `mask', select the records but still share the
+    text buffer. """
+
+    # pylint: disable=R0913
+    def __init__(self, authors, author, works, work, numbers, suffixes,
+                 suffix_values, buffer, starts, ends):
+        self.authors = authors
+        self.author = author
+        self.works = works
+        self.work = work
+        self.numbers = numbers
+        self.suffixes = suffixes
+        self.suffix_values = suffix_values
+        self._buffer = buffer
+        self._starts = starts
+        self._ends = ends
+
+    @classmethod
+    def from_records(cls, records):
+        """ Build a table from [ID, text] records. """
+        authors, works = {}, {}
+        author, work = array.array("i"), array.array("i")
+        numbers = {level: array.array("i") for level in LEVELS.values()}
+        suffixes = {level: array.array("i") for level in LEVELS.values()}
+        suffix_values = {level: {"": 0} for level in LEVELS.values()}
+        buffer = bytearray()
+        offsets = array.array("q", [0])
+        for ids, text in records:
+            author.append(authors.setdefault(ids.get(0x80, ""), len(authors)))
+            work.append(works.setdefault(ids.get(0x81, ""), len(works)))
+            for level in LEVELS.values():
+                number, suffix = split(ids.get(level, ""))
+                numbers[level].append(number)
+                suffixes[level].append(suffix_values[level].setdefault(
+                    suffix, len(suffix_values[level])))
+            buffer += text.encode("utf-8")
+            offsets.append(len(buffer))
+        offsets = numpy.frombuffer(offsets, dtype=numpy.int64)
+        return cls(list(authors), numpy.frombuffer(author, dtype=numpy.int32),
+                   list(works), numpy.frombuffer(work, dtype=numpy.int32),
+                   {level: numpy.frombuffer(column, dtype=numpy.int32)
+                    for level, column in numbers.items()},
+                   {level: numpy.frombuffer(column, dtype=numpy.int32)
+                    for level, column in suffixes.items()},
+                   {level: list(values)
+                    for level, values in suffix_values.items()},
+                   numpy.frombuffer(bytes(buffer), dtype=numpy.uint8),
+                   offsets[:-1], offsets[1:])
+
+    @classmethod
+    def from_txt(cls, path):
+        """ Build a table from the text file `path', streaming its
+        records. """
+        return cls.from_records(Txt(path, lazy=True).read_records())
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        """ Select records by slice, mask or array of record numbers. """
+        if isinstance(index, (int, numpy.integer)):
+            return self.record(index)
+        return Table(self.authors, self.author[index],
+                     self.works, self.work[index],
+                     {level: column[index]
+                      for level, column in self.numbers.items()},
+                     {level: column[index]
+                      for level, column in self.suffixes.items()},
+                     self.suffix_values, self._buffer,
+                     self._starts[index], self._ends[index])
+
+    def mask(self, author=None, work=None, **levels):
+        """ Return the mask of the records of `author' and `work' whose
+        citation levels (given by name, e.g. y=4 or z="12a") match. """
+        result = numpy.ones(len(self), dtype=bool)
+        if author is not None:
+            if author not in self.authors:
+                return numpy.zeros(len(self), dtype=bool)
+            result &= self.author == self.authors.index(author)
+        if work is not None:
+            if work not in self.works:
+                return numpy.zeros(len(self), dtype=bool)
+            result &= self.work == self.works.index(work)
+        for name, value in levels.items():
+            level = LEVELS[name]
+            number, suffix = split(str(value))
+            if suffix not in self.suffix_values[level]:
+                return numpy.zeros(len(self), dtype=bool)
+            result &= self.numbers[level] == number
+            result &= self.suffixes[level] == \
+                      self.suffix_values[level].index(suffix)
+        return result
+
+    def lengths(self):
+        """ Return the lengths of the texts, in UTF-8 bytes. """
+        return self._ends - self._starts
+
+    def text(self, number):
+        """ Return the text of record `number'. """
+        return self._buffer[self._starts[number]:self._ends[number]] \
+                   .tobytes().decode("utf-8")
+
+    def citation(self, number):
+        """ Return the ID of record `number'. """
+        ids = {}
+        if self.authors[self.author[number]]:
+            ids[0x80] = self.authors[self.author[number]]
+        if self.works[self.work[number]]:
+            ids[0x81] = self.works[self.work[number]]
+        for level in LEVELS.values():
+            value = self.numbers[level][number]
+            suffix = self.suffix_values[level][self.suffixes[level][number]]
+            if value >= 0 or suffix:
+                ids[level] = (str(value) if value >= 0 else "") + suffix
+        return ids
+
+    def record(self, number):
+        """ Return record `number' as an [ID, text] pair. """
+        return [self.citation(number), self.text(number)]
+
+def split(value):
+    """ Split an ID value in its leading number (-1 if none) and its
+    suffix. Numbers with leading zeros are kept in the suffix, so that
+    the value can be rebuilt. """
+    number, suffix = re.match(r"([0-9]*)(.*)", value, re.DOTALL).groups()
+    if not number or str(int(number)) != number:
+        return -1, value
+    return int(number), suffix
+
+def content(path):
+    """ Return the content of a TXT file as a table. """
+    return Table.from_txt(path)
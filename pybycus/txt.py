@@ -1,6 +1,11 @@
 """ TXT file parser. """
 
-from pybycus.file import File
+import bisect
+import collections
+import os
+import sys
+import pybycus.beta
+from pybycus.file import File, ParseError, BLOCK_SIZE
 
 class Txt(File):
     """ Text Files
@@ -24,8 +29,64 @@ class Txt(File):
     the end of block marker for the final block. Records do not
     span blocks. """
 
-    def __init__(self, path):
-        super().__init__(path)
+    # pylint: disable=R0913
+    def __init__(self, path, limits=None, lazy=False, sink=None,
+                 workers=0, batch=1000):
+        super().__init__(path, limits)
+
+        # Descriptors apply to all the records that follow until they
+        # change. Rather than being stored in each record, they are
+        # kept as runs: the number and the citation key (see `_key') of
+        # the first record of each run, and the descriptors that are
+        # then active. Authors and works are numbered as they are met.
+        self._count = 0
+        self._starts = []
+        self._keys = []
+        self._values = []
+        self._groups = {}
+        # The runs sorted by key, built on demand by `descriptors_of'.
+        self._sorted = []
+
+        # In lazy mode, nothing is read until records are requested
+        # with `read_records' or `read_block'.
+        if lazy:
+            return
+
+        # With `workers', Beta Code is converted in a pool of processes
+        # (as many as there are cores if None).
+        if workers == 0:
+            records = self.read_records()
+        else:
+            records = self.read_records_parallel(workers, batch)
+
+        # When a record would make the records held in memory exceed
+        # the limits, they are handed over to `sink' if there is one,
+        # and the parse fails otherwise. In the former case, the
+        # content is left empty.
+        memory = 0
+        for record in records:
+            size = sys.getsizeof(record[0]) + sys.getsizeof(record[1])
+            if self._content and \
+               self._limits.exceeded(len(self._content) + 1, memory + size):
+                if sink is None:
+                    raise ParseError("too many records", self._f.tell())
+                sink(self._content)
+                self._content = []
+                memory = 0
+            self._content.append(record)
+            memory += size
+        if sink is not None and self._content:
+            sink(self._content)
+            self._content = []
+
+    def read_records(self, convert=True, quotes=None):
+        """ Iterate over the records, from the current position to the
+        end of the file. Unless `convert' is set, the text is left in
+        Beta Code. If `quotes' is given, it is used as the quotation
+        marks state of the conversions instead of the shared one (see
+        `pybycus.beta.convert'). """
+        if quotes is not None:
+            self._quotes = quotes
 
         # Processing a block of text is therefore simple. Read in
         # all bytes with the sign bit set. This is the ID for the first
@@ -41,12 +102,147 @@ class Txt(File):
                 _ = self.read_ubyte()
             elif self.peek_ubyte() > 0x7f:
                 ids = self.read_id()
+                self._groups.setdefault((self._id.get(0x80),
+                                         self._id.get(0x81)),
+                                        len(self._groups))
             else:
-                self._content.append([self._id.copy(), self.read_string()])
+                if self._descriptors_changed:
+                    self._descriptors_changed = False
+                    if (self._values[-1] if self._values else {}) != \
+                       self._descriptors:
+                        self._starts.append(self._count)
+                        self._keys.append(self._key(self._id))
+                        self._values.append(self._descriptors.copy())
+                self._count += 1
+                if convert:
+                    yield [self._id.copy(), self.read_string()]
+                else:
+                    yield [self._id.copy(), self.read_raw_string()]
+
+    def read_records_parallel(self, workers=None, batch=1000):
+        """ Iterate over the records, like `read_records', but convert
+        their text in a pool of `workers' processes.
+
+        The records are parsed in this process and handed over to the
+        pool by batches of `batch' records, along with the state of the
+        quotation marks at the start of each batch, which is found by
+        scanning the Beta Code of the previous batches. The results are
+        then gathered in order.
+
+        The records still go through this process twice, and are copied
+        to and from the pool: this only pays off on several cores, when
+        the conversion dominates the parse. The `txt' and `txt-workers'
+        stages of `pybycus.bench' compare both modes. """
+        # pylint: disable=C0415
+        import concurrent.futures
+        workers = workers or os.cpu_count()
+        state = pybycus.beta.quote_state()
+        pending = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            records = []
+            for record in self.read_records(convert=False):
+                records.append(record)
+                if len(records) < batch:
+                    continue
+                strings = [text for _, text in records]
+                pending.append((records, pool.submit(
+                    pybycus.beta.convert_all, strings, state)))
+                for string in strings:
+                    state = pybycus.beta.scan_quotes(string, state)
+                records = []
+                # Bound the number of batches held in memory.
+                while len(pending) > 2 * workers:
+                    yield from self._gather(*pending.popleft())
+            if records:
+                pending.append((records, pool.submit(
+                    pybycus.beta.convert_all,
+                    [text for _, text in records], state)))
+                for _, text in records:
+                    state = pybycus.beta.scan_quotes(text, state)
+            while pending:
+                yield from self._gather(*pending.popleft())
+        pybycus.beta.set_quote_state(state)
+
+    @staticmethod
+    def _gather(records, future):
+        """ Replace the text of `records' with their conversion. """
+        for record, text in zip(records, future.result()):
+            record[1] = text
+        return records
+
+    def read_block(self, block):
+        """ Return the records of block `block'.
+
+        Since each block begins with the full citation for its first
+        record, a block can be decoded without reading the ones that
+        precede it. Likewise, quotation marks are taken as closed at
+        the start of the block, whatever was decoded before. """
+        self.seek_block(block)
+        self._id = {}
+        self._descriptors = {}
+        quotes = self._quotes
+        self._quotes = [True] * len(pybycus.beta.quote_state())
+        end = (block + 1) * BLOCK_SIZE
+        records = []
+        try:
+            while self._f.tell() < end:
+                if self.peek_ubyte() is None:
+                    break
+                if self.peek_ubyte() == 0x00:
+                    break
+                if self.peek_ubyte() > 0x7f:
+                    _, token = self.read_id()
+                    # end-of-block
+                    if token == 0xfe:
+                        break
+                else:
+                    records.append([self._id.copy(), self.read_string()])
+        finally:
+            self._quotes = quotes
+        return records
+
+    def descriptors(self, number):
+        """ Return the descriptors (levels a..z) active at record
+        `number', counting from the start of the file. """
+        run = bisect.bisect_right(self._starts, number) - 1
+        return self._values[run] if run >= 0 else {}
+
+    def descriptors_of(self, ids):
+        """ Return the descriptors active at the record with ID `ids',
+        such as returned by `read_block'. The records must have been
+        read from the start of the file, even if not kept (in lazy or
+        sink mode).
+
+        Runs are found by citation within each work: the runs are
+        sorted by the key of their first record, so that an
+        out-of-sequence line gets the descriptors of the run it starts,
+        if any, and otherwise those of the lines its citation falls
+        between. """
+        key = self._key(ids)
+        if key is None:
+            return {}
+        if len(self._sorted) != len(self._keys):
+            self._sorted = sorted((start, run)
+                                  for run, start in enumerate(self._keys))
+        # The last run starting at `key' or before, in the same work.
+        found = bisect.bisect_right(self._sorted, (key, len(self._keys))) - 1
+        if found < 0 or self._sorted[found][0][0] != key[0]:
+            return {}
+        return self._values[self._sorted[found][1]]
+
+    def _key(self, ids):
+        """ Return the citation key of `ids': the rank of its author and
+        work in the file, then its levels n, v..z. """
+        # pylint: disable=C0415
+        from pybycus.cite import key
+        group = self._groups.get((ids.get(0x80), ids.get(0x81)))
+        if group is None:
+            return None
+        return group, key(ids, (0xd, 0xc, 0xb, 0xa, 0x9, 0x8))
 
-def content(path):
+def content(path, limits=None, workers=0):
     """ Return the content of a TXT file. """
-    return Txt(path).content()
+    return Txt(path, limits=limits, workers=workers).content()
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,84 @@
+""" Tests of the citation lookup. """
+
+import os
+import shutil
+import tempfile
+import unittest
+from pybycus.cite import Index, fetch, lookup
+from pybycus.file import BLOCK_SIZE
+
+def _string(value):
+    """ Return the ID bytes of an ASCII string. """
+    return bytes(ord(c) | 0x80 for c in value) + b"\xff"
+
+# Author 0001, work 001.
+HEADER = b"\xef\x80" + _string("0001") + b"\xef\x81" + _string("001")
+
+def _line(number):
+    """ Return the ID bytes of a z-level line number. """
+    return bytes([0x8b, number >> 7 | 0x80, number & 0x7f | 0x80])
+
+def _block(data):
+    """ Return a block ending with `data'. """
+    data += b"\xfe"
+    return data + b"\x00" * (BLOCK_SIZE - len(data))
+
+def _text():
+    """ Return a text file where document 1 spans blocks 0 and 1, and
+    document 2 follows in block 1. """
+    first = HEADER + b"\xd1" + b"line 1"
+    for number in range(2, 21):
+        first += b"\x80" + b"line %d" % number
+    second = HEADER + b"\xd1" + _line(21) + b"line 21"
+    for number in range(22, 41):
+        second += b"\x80" + b"line %d" % number
+    second += b"\xd2" + b"line 1"
+    for number in range(2, 11):
+        second += b"\x80" + b"line %d" % number
+    return _block(first) + _block(second)
+
+def _table():
+    """ Return the ID table of `_text': block ends are only given to
+    the document (n) level. """
+    work = b"\x00\x00\xef\x81" + _string("001") + \
+           b"\x03\x00\x00\x08\xd1\x0a\xd1\x0a\xd2"
+    work = b"\x02" + (2 + len(work)).to_bytes(2, "big") + work
+    author = b"\x00\x00\xef\x80" + _string("0001") + work
+    return b"\x01" + (2 + len(author)).to_bytes(2, "big") + author + b"\x00"
+
+class TestDocuments(unittest.TestCase):
+    """ Lookup of the lines of documents. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "DOC.TXT")
+        with open(self.path, "wb") as f:
+            f.write(_text())
+        with open(os.path.join(self.directory, "DOC.IDT"), "wb") as f:
+            f.write(_table())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_candidates(self):
+        """ A document ending several blocks may be in any of them. """
+        index = Index(self.path)
+        self.assertEqual(index.candidates("001", {0xd: "1", 0x8: "5"}),
+                         [0, 1])
+        self.assertEqual(index.candidates("001", {0xd: "2", 0x8: "3"}), [1])
+        index.close()
+
+    def test_lookup(self):
+        """ Lines are found in the block that holds them. """
+        for document, line in (("1", "5"), ("1", "30"), ("2", "3")):
+            ids, text = lookup(self.path, "001", {0xd: document, 0x8: line})
+            self.assertEqual((ids[0xd], ids[0x8]), (document, line))
+            self.assertEqual(text, "line " + line)
+        self.assertIsNone(lookup(self.path, "001", {0xd: "1", 0x8: "99"}))
+        self.assertEqual([record[1] for record in fetch(
+            [(self.path, "001", {0xd: "1", 0x8: line})
+             for line in ("30", "5", "21", "20")])],
+                         ["line 30", "line 5", "line 21", "line 20"])
+
+if __name__ == "__main__":
+    unittest.main()
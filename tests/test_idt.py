@@ -0,0 +1,74 @@
+""" Tests of the IDT file parser. """
+
+import io
+import unittest
+from pybycus.idt import Idt
+
+def _string(value):
+    """ Return the ID bytes of an ASCII string. """
+    return bytes(ord(c) | 0x80 for c in value) + b"\xff"
+
+# Type 17 descriptions of the y and z levels.
+LEVELS = b"\x11\x01\x04book\x11\x00\x04line"
+
+def _work(wnum, first, last, desc=b""):
+    """ Return a work section of a single block, from ID `first' to
+    ID `last'. """
+    body = b"\x00\x00\xef\x81" + _string(wnum) + desc + b"\x03\x00\x00" + \
+           b"\x08" + first + b"\x0a" + last
+    return b"\x02" + (2 + len(body)).to_bytes(2, "big") + body
+
+def _table(*works):
+    """ Return an ID table of author 0001 holding `works'. """
+    body = b"\x00\x00\xef\x80" + _string("0001") + b"".join(works)
+    return b"\x01" + (2 + len(body)).to_bytes(2, "big") + body + b"\x00"
+
+class _Idt(Idt):
+    """ ID table counting its reads. """
+
+    reads = 0
+
+    def parse(self, anum, wnum, seek):
+        self.reads += 1
+        super().parse(anum, wnum, seek)
+
+class TestSkip(unittest.TestCase):
+    """ Reading of single authors and works. """
+
+    def check(self, table):
+        """ Compare the works read alone to the full table. """
+        works = Idt(io.BytesIO(table)).authors()[0]["works"]
+        for wnum in works:
+            authors = Idt(io.BytesIO(table), wnum=wnum).authors()
+            self.assertEqual(authors, [{"anum": "0001",
+                                        "works": {wnum: works[wnum]}}])
+        self.assertEqual(Idt(io.BytesIO(table), anum="0002").authors(), [])
+        return works
+
+    def test_incremental(self):
+        """ The second work starts with an increment of the last line
+        of the first one. """
+        works = self.check(_table(_work("001", b"\x91\x81", b"\x8b\x80\xb2"),
+                                  _work("002", b"\x80", b"\x8b\x80\xb4")))
+        self.assertEqual(works["002"]["blocks"], [(0, {0x9: "1", 0x8: "52"})])
+
+    def test_abbreviated(self):
+        """ The second work only gives the z level, keeping the y level
+        of the first one. """
+        works = self.check(_table(
+            _work("001", b"\x91\x81", b"\x95\x8b\x80\xb2"),
+            _work("002", b"\x8b\x80\xb3", b"\x8b\x80\xb4")))
+        self.assertEqual(works["002"]["blocks"], [(0, {0x9: "5", 0x8: "52"})])
+
+    def test_full(self):
+        """ Works starting with full IDs are not read again. """
+        table = _table(_work("001", b"\x91\x81", b"\x95\x8b\x80\xb2", LEVELS),
+                       _work("002", b"\x91\x81", b"\x93\x8b\x80\xb4", LEVELS))
+        self.check(table)
+        idt = _Idt(io.BytesIO(table), wnum="002")
+        self.assertEqual(idt.reads, 1)
+        self.assertEqual(idt.authors()[0]["works"]["002"]["blocks"],
+                         [(0, {0x9: "3", 0x8: "52"})])
+
+if __name__ == "__main__":
+    unittest.main()
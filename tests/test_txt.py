@@ -0,0 +1,79 @@
+""" Tests of the TXT file parser. """
+
+import os
+import tempfile
+import unittest
+import pybycus.beta
+from pybycus.file import BLOCK_SIZE
+from pybycus.txt import Txt
+
+def _block(first, count):
+    """ Return a block of `count' records, the first one being line
+    `first'; each record opens or closes a quotation. """
+    data = bytearray([0x8b]) + bytes([first >> 7 | 0x80, first & 0x7f | 0x80])
+    for i in range(count):
+        if i:
+            # z-level increment
+            data.append(0x80)
+        data += b'"3ARMA VIRUMQUE CANO'
+    data.append(0xfe)
+    return bytes(data) + b"\x00" * (BLOCK_SIZE - len(data))
+
+def _line(number, descriptor, count):
+    """ Return `count' records from line `number' on, the first one
+    setting descriptor level 0xe3 to `descriptor'. """
+    data = b"\xef\xe3" + bytes([ord(descriptor) | 0x80]) + b"\xff" + \
+           bytes([0x8b, number >> 7 | 0x80, number & 0x7f | 0x80])
+    return data + b"\x80".join([b"LINE"] * count)
+
+class TestReadBlock(unittest.TestCase):
+    """ Decoding of single blocks. """
+
+    def setUp(self):
+        f = tempfile.NamedTemporaryFile(suffix=".TXT", delete=False)
+        with f:
+            f.write(_block(1, 3) + _block(4, 3))
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_repeated(self):
+        """ A block decodes to the same text whatever was decoded before. """
+        txt = Txt(self.path, lazy=True)
+        first = txt.read_block(1)
+        txt.read_block(0)
+        pybycus.beta.convert('"3')
+        self.assertEqual(txt.read_block(1), first)
+        self.assertEqual(txt.read_block(1), first)
+        self.assertEqual([ids for ids, _ in first],
+                         [{0x8: "4"}, {0x8: "5"}, {0x8: "6"}])
+
+class TestDescriptors(unittest.TestCase):
+    """ Descriptors of the records. """
+
+    def setUp(self):
+        data = _line(1, "A", 5) + _line(100, "B", 1) + _line(6, "A", 3) + \
+               b"\xfe"
+        f = tempfile.NamedTemporaryFile(suffix=".TXT", delete=False)
+        with f:
+            f.write(data + b"\x00" * (BLOCK_SIZE - len(data)))
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_out_of_sequence(self):
+        """ An out-of-sequence line keeps the descriptors of its run. """
+        txt = Txt(self.path)
+        txt.close()
+        self.assertEqual([txt.descriptors(number) for number in range(9)],
+                         [{0xe3: "A"}] * 5 + [{0xe3: "B"}] + [{0xe3: "A"}] * 3)
+        for ids, _ in txt.content():
+            self.assertEqual(txt.descriptors_of(ids),
+                             {0xe3: "B" if ids[0x8] == "100" else "A"})
+        self.assertEqual(txt.descriptors_of({0x8: "50"}), {0xe3: "A"})
+        self.assertEqual(txt.descriptors_of({0x80: "0002", 0x8: "1"}), {})
+
+if __name__ == "__main__":
+    unittest.main()